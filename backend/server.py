@@ -1,40 +1,88 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, WriteConcern
 import os
+import asyncio
+import hashlib
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 from typing import List, Optional
 import uuid
 from datetime import datetime, timedelta
+import cachetools
+import orjson
 import jwt
 import bcrypt
+from argon2 import PasswordHasher
+from argon2 import exceptions as argon2_exceptions
 from enum import Enum
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. Cap the pool at a sensible size instead of the default
+# 100 sockets, keep a few connections open so the first requests after a
+# restart do not pay the TCP handshake, and tag connections for server-side
+# diagnostics.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=50,
+    minPoolSize=10,
+    serverSelectionTimeoutMS=2000,
+    appname="scout-ouragan",
+    uuidRepresentation="standard",
+)
 db = client[os.environ['DB_NAME']]
 
+# Acknowledged but not journal-synced: used for delete paths, where a write
+# lost to a crash in the journal window just means redoing the click. Creates
+# and credential updates keep the default durable write concern.
+FAST_WRITE = WriteConcern(w=1, j=False)
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# JWT Settings
-JWT_SECRET = "scout_ouragan_secret_key_2024"
-JWT_ALGORITHM = "HS256"
+# JWT Settings. With a PEM Ed25519 key in JWT_PRIVATE_KEY, tokens are signed
+# with EdDSA (faster verification, no shared secret on verifiers); otherwise
+# HS256 with the mandatory JWT_SECRET from the environment.
+JWT_PRIVATE_KEY = os.environ.get('JWT_PRIVATE_KEY')
+if JWT_PRIVATE_KEY:
+    from cryptography.hazmat.primitives import serialization
+    JWT_ALGORITHM = "EdDSA"
+    _jwt_signing_key = serialization.load_pem_private_key(
+        JWT_PRIVATE_KEY.encode('utf-8'), password=None
+    )
+    _jwt_verify_key = _jwt_signing_key.public_key()
+else:
+    JWT_ALGORITHM = "HS256"
+    _jwt_signing_key = _jwt_verify_key = os.environ['JWT_SECRET']
 JWT_EXPIRATION_HOURS = 24
 
 security = HTTPBearer()
 
+# Cache of verified tokens: sha256(token) -> decoded payload. Entries expire
+# after 30s and the token expiry is re-checked on every hit so entries never
+# outlive the token.
+_token_cache = cachetools.TTLCache(maxsize=4096, ttl=30)
+
+# Usernames of existing admins, refreshed in the background so deleted
+# accounts are locked out without a Mongo round-trip on every request. The
+# loop task is kept here because the event loop only holds a weak reference.
+_known_admins: Optional[set] = None
+_admin_refresh_task: Optional[asyncio.Task] = None
+ADMIN_REFRESH_SECONDS = 30
+
 # Enums
 class BranchType(str, Enum):
     MEUTE = "meute"
@@ -47,13 +95,43 @@ class OrganType(str, Enum):
     MAITRISE = "maitrise"
     ASSEMBLEE = "assemblee"
 
-# Models
+# Compact integer codes stored in Mongo in place of the enum strings; they
+# shrink documents and branch index entries while the API keeps speaking
+# strings. Models decode either representation on read.
+BRANCH_CODES = {
+    BranchType.MEUTE: 0,
+    BranchType.TROUPE: 1,
+    BranchType.COMPAGNIE: 2,
+    BranchType.CLAN: 3,
+}
+BRANCH_FROM_CODE = {code: branch for branch, code in BRANCH_CODES.items()}
+ORGAN_CODES = {
+    OrganType.CONSEIL: 0,
+    OrganType.MAITRISE: 1,
+    OrganType.ASSEMBLEE: 2,
+}
+ORGAN_FROM_CODE = {code: organ for organ, code in ORGAN_CODES.items()}
+
+def encode_enum_codes(doc: dict) -> dict:
+    """Rewrite branch/organ values to their stored integer codes in place."""
+    if doc.get("branch") is not None:
+        doc["branch"] = BRANCH_CODES[BranchType(doc["branch"])]
+    if doc.get("organ") is not None:
+        doc["organ"] = ORGAN_CODES[OrganType(doc["organ"])]
+    return doc
+
+# Models. The generated UUID is stored as Mongo's _id (so point lookups use
+# the primary index and no parallel id field is kept). The alias only covers
+# Mongo I/O: routes serialize by field name so responses keep saying "id".
 class Admin(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
     username: str
     password_hash: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    class Config:
+        populate_by_name = True
+
 class AdminLogin(BaseModel):
     username: str
     password: str
@@ -63,7 +141,7 @@ class AdminCreate(BaseModel):
     password: str
 
 class Member(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
     nom: str
     prenom: str
     age: int
@@ -71,14 +149,29 @@ class Member(BaseModel):
     date_inscription: datetime = Field(default_factory=datetime.utcnow)
     actif: bool = True
 
+    class Config:
+        populate_by_name = True
+
+    @field_validator("branch", mode="before")
+    @classmethod
+    def _branch_from_code(cls, v):
+        return BRANCH_FROM_CODE.get(v, v)
+
 class MemberCreate(BaseModel):
     nom: str
     prenom: str
     age: int
     branch: BranchType
 
+class MemberUpdate(BaseModel):
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    age: Optional[int] = None
+    branch: Optional[BranchType] = None
+    actif: Optional[bool] = None
+
 class Activity(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
     titre: str
     description: str
     date_activite: datetime
@@ -88,6 +181,19 @@ class Activity(BaseModel):
     image: Optional[str] = None  # Base64 encoded image
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    class Config:
+        populate_by_name = True
+
+    @field_validator("branch", mode="before")
+    @classmethod
+    def _branch_from_code(cls, v):
+        return BRANCH_FROM_CODE.get(v, v)
+
+    @field_validator("organ", mode="before")
+    @classmethod
+    def _organ_from_code(cls, v):
+        return ORGAN_FROM_CODE.get(v, v)
+
 class ActivityCreate(BaseModel):
     titre: str
     description: str
@@ -97,136 +203,265 @@ class ActivityCreate(BaseModel):
     lieu: Optional[str] = None
     image: Optional[str] = None  # Base64 encoded image
 
+class ActivityUpdate(BaseModel):
+    titre: Optional[str] = None
+    description: Optional[str] = None
+    date_activite: Optional[datetime] = None
+    branch: Optional[BranchType] = None
+    organ: Optional[OrganType] = None
+    lieu: Optional[str] = None
+    image: Optional[str] = None  # Base64 encoded image
+
+# Fields that may never be null in the stored documents. The update models
+# use None to mean "not sent", so an explicit null for one of these would
+# otherwise be written verbatim and corrupt the document.
+MEMBER_NON_NULLABLE = {"nom", "prenom", "age", "branch", "actif"}
+ACTIVITY_NON_NULLABLE = {"titre", "description", "date_activite"}
+
+def drop_null_fields(update_data: dict, non_nullable: set) -> dict:
+    return {
+        k: v for k, v in update_data.items()
+        if v is not None or k not in non_nullable
+    }
+
 class PedagogicalProject(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id")
     titre: str
     contenu: str
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    class Config:
+        populate_by_name = True
+
 class PedagogicalProjectUpdate(BaseModel):
     titre: str
     contenu: str
 
 # Auth functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# New hashes use argon2id (memory-hard, the current OWASP recommendation);
+# costs are tunable per deployment via the environment. Existing bcrypt
+# hashes still verify and are upgraded on the next successful login.
+password_hasher = PasswordHasher(
+    time_cost=int(os.environ.get("ARGON2_TIME_COST", "2")),
+    memory_cost=int(os.environ.get("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.environ.get("ARGON2_PARALLELISM", "1")),
+)
+
+def hash_password(password) -> str:
+    return password_hasher.hash(password)
 
-def verify_password(password: str, hash: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hash.encode('utf-8'))
+def verify_password(password, hash: str) -> bool:
+    # Accepts str or pre-encoded bytes so callers that both verify and
+    # rehash only pay the UTF-8 encode once
+    if hash.startswith("$2"):  # legacy bcrypt hash
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        return bcrypt.checkpw(password, hash.encode('utf-8'))
+    try:
+        return password_hasher.verify(hash, password)
+    except (argon2_exceptions.VerificationError, argon2_exceptions.InvalidHashError):
+        # A stored hash that is neither bcrypt nor valid argon2 must read as
+        # a failed login, not a server error
+        return False
+
+def password_needs_rehash(hash: str) -> bool:
+    return hash.startswith("$2") or password_hasher.check_needs_rehash(hash)
 
 def create_jwt_token(username: str) -> str:
     payload = {
         "username": username,
         "exp": datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _jwt_signing_key, algorithm=JWT_ALGORITHM)
 
 def verify_jwt_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, _jwt_verify_key, algorithms=[JWT_ALGORITHM])
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def refresh_known_admins():
+    global _known_admins
+    usernames = await db.admins.find({}, {"username": 1}).to_list(None)
+    _known_admins = {a["username"] for a in usernames}
+
+async def _admin_refresh_loop():
+    while True:
+        try:
+            await refresh_known_admins()
+        except Exception:
+            logger.exception("Failed to refresh admin username set")
+        await asyncio.sleep(ADMIN_REFRESH_SECONDS)
+
+async def load_admin(username: str) -> dict:
+    """Fetch the full admin document for the rare endpoints that need it."""
+    admin = await db.admins.find_one({"username": username})
+    if admin is None:
+        raise HTTPException(status_code=401, detail="Admin not found")
+    return admin
+
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
+    key = hashlib.sha256(credentials.credentials.encode('utf-8')).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is not None and payload["exp"] <= time.time():
+        _token_cache.pop(key, None)
+        payload = None
+    if payload is None:
         payload = verify_jwt_token(credentials.credentials)
-        admin = await db.admins.find_one({"username": payload["username"]})
-        if admin is None:
-            raise HTTPException(status_code=401, detail="Admin not found")
-        return admin
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication")
+        _token_cache[key] = payload
+    username = payload["username"]
+    # The signature already vouches for the username; the set only catches
+    # admins deleted since the token was issued.
+    if _known_admins is not None and username not in _known_admins:
+        raise HTTPException(status_code=401, detail="Admin not found")
+    return {"username": username}
 
 # Public Routes
 @api_router.get("/")
 async def root():
     return {"message": "Groupe Scout Ouragan API"}
 
+# Static description of the group's branches and organs, built once at import
+# time instead of on every request
+BRANCHES_INFO = {
+    "branches": [
+        {
+            "name": "Meute",
+            "age_range": "6-12 ans",
+            "type": "meute",
+            "description": "Découverte et jeux pour les plus jeunes scouts"
+        },
+        {
+            "name": "Troupe",
+            "age_range": "12-16 ans",
+            "type": "troupe",
+            "description": "Aventures et camping pour les adolescents"
+        },
+        {
+            "name": "Compagnie",
+            "age_range": "17-19 ans",
+            "type": "compagnie",
+            "description": "Projets de service et leadership"
+        },
+        {
+            "name": "Clan",
+            "age_range": "20-25 ans",
+            "type": "clan",
+            "description": "Engagement communautaire et mentorat"
+        }
+    ],
+    "organs": [
+        {
+            "name": "Conseil du Groupe",
+            "type": "conseil",
+            "description": "Organe de décision du groupe scout"
+        },
+        {
+            "name": "Maîtrise du Groupe",
+            "type": "maitrise",
+            "description": "Équipe des chefs et responsables"
+        },
+        {
+            "name": "Assemblée Générale",
+            "type": "assemblee",
+            "description": "Rassemblement annuel de tous les membres"
+        }
+    ]
+}
+
+# The payload never changes, so serialize it once and let clients and CDNs
+# cache the response for an hour
+_branches_body = orjson.dumps(BRANCHES_INFO)
+
 @api_router.get("/branches")
 async def get_branches_info():
-    return {
-        "branches": [
-            {
-                "name": "Meute",
-                "age_range": "6-12 ans",
-                "type": "meute",
-                "description": "Découverte et jeux pour les plus jeunes scouts"
-            },
-            {
-                "name": "Troupe",
-                "age_range": "12-16 ans", 
-                "type": "troupe",
-                "description": "Aventures et camping pour les adolescents"
-            },
-            {
-                "name": "Compagnie",
-                "age_range": "17-19 ans",
-                "type": "compagnie", 
-                "description": "Projets de service et leadership"
-            },
-            {
-                "name": "Clan",
-                "age_range": "20-25 ans",
-                "type": "clan",
-                "description": "Engagement communautaire et mentorat"
-            }
-        ],
-        "organs": [
-            {
-                "name": "Conseil du Groupe",
-                "type": "conseil",
-                "description": "Organe de décision du groupe scout"
-            },
-            {
-                "name": "Maîtrise du Groupe", 
-                "type": "maitrise",
-                "description": "Équipe des chefs et responsables"
-            },
-            {
-                "name": "Assemblée Générale",
-                "type": "assemblee", 
-                "description": "Rassemblement annuel de tous les membres"
-            }
-        ]
-    }
+    return Response(
+        content=_branches_body,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+# Bulk adapters decode whole result pages in pydantic-core (compiled) rather
+# than one Python-level model constructor per row
+member_list_adapter = TypeAdapter(List[Member])
+activity_list_adapter = TypeAdapter(List[Activity])
+
+def dump_member_list(docs: list) -> list:
+    # Validate the stored documents (the alias maps _id on input), then dump
+    # by field name so responses say "id"; plain dicts also keep FastAPI's
+    # encoder from re-applying the alias
+    validated = member_list_adapter.validate_python(docs)
+    return member_list_adapter.dump_python(validated, mode="json", by_alias=False)
+
+def dump_activity_list(docs: list) -> list:
+    validated = activity_list_adapter.validate_python(docs)
+    return activity_list_adapter.dump_python(validated, mode="json", by_alias=False)
+
+async def paginate(cursor, skip: int, limit: int) -> list:
+    out = []
+    async for doc in cursor.skip(skip).limit(limit):
+        out.append(doc)
+    return out
 
 @api_router.get("/members")
-async def get_all_members():
-    members = await db.members.find({"actif": True}).to_list(1000)
-    return [Member(**member) for member in members]
+async def get_all_members(limit: int = Query(50, ge=1, le=200), skip: int = Query(0, ge=0)):
+    members = await paginate(db.members.find({"actif": True}), skip, limit)
+    return dump_member_list(members)
 
 @api_router.get("/members/{branch}")
-async def get_members_by_branch(branch: BranchType):
-    members = await db.members.find({"branch": branch, "actif": True}).to_list(1000)
-    return [Member(**member) for member in members]
+async def get_members_by_branch(branch: BranchType, limit: int = Query(50, ge=1, le=200), skip: int = Query(0, ge=0)):
+    members = await paginate(db.members.find({"branch": BRANCH_CODES[branch], "actif": True}), skip, limit)
+    return dump_member_list(members)
+
+# The base64 image blob dwarfs every other activity field and the listing
+# pages never render it, so keep it out of list responses
+ACTIVITY_LIST_PROJECTION = {"image": 0}
 
 @api_router.get("/activities")
-async def get_all_activities():
-    activities = await db.activities.find().sort("date_activite", -1).to_list(1000)
-    return [Activity(**activity) for activity in activities]
+async def get_all_activities(limit: int = Query(50, ge=1, le=200), skip: int = Query(0, ge=0)):
+    cursor = (db.activities.find({}, ACTIVITY_LIST_PROJECTION)
+              .sort("date_activite", -1)
+              .hint([("date_activite", -1)]))
+    activities = await paginate(cursor, skip, limit)
+    return dump_activity_list(activities)
 
 @api_router.get("/activities/{branch}")
-async def get_activities_by_branch(branch: BranchType):
-    activities = await db.activities.find({"branch": branch}).sort("date_activite", -1).to_list(1000)
-    return [Activity(**activity) for activity in activities]
+async def get_activities_by_branch(branch: BranchType, limit: int = Query(50, ge=1, le=200), skip: int = Query(0, ge=0)):
+    cursor = (db.activities.find({"branch": BRANCH_CODES[branch]}, ACTIVITY_LIST_PROJECTION)
+              .sort("date_activite", -1)
+              .hint([("branch", 1), ("date_activite", -1)]))
+    activities = await paginate(cursor, skip, limit)
+    return dump_activity_list(activities)
 
 @api_router.get("/project")
 async def get_pedagogical_project():
     project = await db.pedagogical_projects.find_one()
     if project:
-        return PedagogicalProject(**project)
+        # dict() serializes by field name, so the response says "id"
+        return PedagogicalProject(**project).dict()
     return {"titre": "Projet Pédagogique", "contenu": "Le projet pédagogique sera bientôt disponible."}
 
 # Auth Routes
 @api_router.post("/auth/login")
 async def login(admin_login: AdminLogin):
     admin = await db.admins.find_one({"username": admin_login.username})
-    if not admin or not verify_password(admin_login.password, admin["password_hash"]):
+    password = admin_login.password.encode('utf-8')
+    # Hashing takes tens of milliseconds by design; run it in the thread pool
+    # so it does not stall every other request on the event loop
+    if not admin or not await asyncio.to_thread(verify_password, password, admin["password_hash"]):
         raise HTTPException(status_code=401, detail="Nom d'utilisateur ou mot de passe incorrect")
-    
+
+    # Transparently upgrade legacy bcrypt (or outdated argon2) hashes
+    if password_needs_rehash(admin["password_hash"]):
+        new_hash = await asyncio.to_thread(hash_password, password)
+        await db.admins.update_one(
+            {"username": admin_login.username},
+            {"$set": {"password_hash": new_hash}}
+        )
+
     token = create_jwt_token(admin_login.username)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -238,59 +473,75 @@ async def create_admin(admin_create: AdminCreate):
         raise HTTPException(status_code=400, detail="Admin already exists")
     
     # Hash password and create admin
-    password_hash = hash_password(admin_create.password)
+    password_hash = await asyncio.to_thread(hash_password, admin_create.password)
     admin = Admin(username=admin_create.username, password_hash=password_hash)
     
-    await db.admins.insert_one(admin.dict())
+    await db.admins.insert_one(admin.dict(by_alias=True))
+    # Make the new account usable immediately instead of after the next
+    # background refresh
+    if _known_admins is not None:
+        _known_admins.add(admin_create.username)
     return {"message": "Admin created successfully"}
 
 # Admin Routes (Protected)
-@api_router.post("/admin/members", response_model=Member)
+@api_router.post("/admin/members", response_model=Member, response_model_by_alias=False)
 async def create_member(member: MemberCreate, current_admin=Depends(get_current_admin)):
     member_obj = Member(**member.dict())
-    await db.members.insert_one(member_obj.dict())
+    await db.members.insert_one(encode_enum_codes(member_obj.dict(by_alias=True)))
     return member_obj
 
-@api_router.put("/admin/members/{member_id}", response_model=Member)
-async def update_member(member_id: str, member_update: MemberCreate, current_admin=Depends(get_current_admin)):
-    member = await db.members.find_one({"id": member_id})
-    if not member:
+@api_router.put("/admin/members/{member_id}", response_model=Member, response_model_by_alias=False)
+async def update_member(member_id: str, member_update: MemberUpdate, current_admin=Depends(get_current_admin)):
+    # Only the fields the client actually sent are written, so partial
+    # updates cannot clobber the rest of the document
+    update_data = drop_null_fields(member_update.dict(exclude_unset=True), MEMBER_NON_NULLABLE)
+    update_data = encode_enum_codes(update_data)
+    if update_data:
+        updated_member = await db.members.find_one_and_update(
+            {"_id": member_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        updated_member = await db.members.find_one({"_id": member_id})
+    if not updated_member:
         raise HTTPException(status_code=404, detail="Member not found")
-    
-    update_data = member_update.dict()
-    await db.members.update_one({"id": member_id}, {"$set": update_data})
-    
-    updated_member = await db.members.find_one({"id": member_id})
     return Member(**updated_member)
 
 @api_router.delete("/admin/members/{member_id}")
 async def delete_member(member_id: str, current_admin=Depends(get_current_admin)):
-    result = await db.members.update_one({"id": member_id}, {"$set": {"actif": False}})
+    result = await db.members.with_options(write_concern=FAST_WRITE).update_one(
+        {"_id": member_id}, {"$set": {"actif": False}}
+    )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Member not found")
     return {"message": "Member deleted successfully"}
 
-@api_router.post("/admin/activities", response_model=Activity)
+@api_router.post("/admin/activities", response_model=Activity, response_model_by_alias=False)
 async def create_activity(activity: ActivityCreate, current_admin=Depends(get_current_admin)):
     activity_obj = Activity(**activity.dict())
-    await db.activities.insert_one(activity_obj.dict())
+    await db.activities.insert_one(encode_enum_codes(activity_obj.dict(by_alias=True)))
     return activity_obj
 
-@api_router.put("/admin/activities/{activity_id}", response_model=Activity)
-async def update_activity(activity_id: str, activity_update: ActivityCreate, current_admin=Depends(get_current_admin)):
-    activity = await db.activities.find_one({"id": activity_id})
-    if not activity:
+@api_router.put("/admin/activities/{activity_id}", response_model=Activity, response_model_by_alias=False)
+async def update_activity(activity_id: str, activity_update: ActivityUpdate, current_admin=Depends(get_current_admin)):
+    update_data = drop_null_fields(activity_update.dict(exclude_unset=True), ACTIVITY_NON_NULLABLE)
+    update_data = encode_enum_codes(update_data)
+    if update_data:
+        updated_activity = await db.activities.find_one_and_update(
+            {"_id": activity_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        updated_activity = await db.activities.find_one({"_id": activity_id})
+    if not updated_activity:
         raise HTTPException(status_code=404, detail="Activity not found")
-    
-    update_data = activity_update.dict()
-    await db.activities.update_one({"id": activity_id}, {"$set": update_data})
-    
-    updated_activity = await db.activities.find_one({"id": activity_id})
     return Activity(**updated_activity)
 
 @api_router.delete("/admin/activities/{activity_id}")
 async def delete_activity(activity_id: str, current_admin=Depends(get_current_admin)):
-    result = await db.activities.delete_one({"id": activity_id})
+    result = await db.activities.with_options(write_concern=FAST_WRITE).delete_one({"_id": activity_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Activity not found")
     return {"message": "Activity deleted successfully"}
@@ -298,44 +549,53 @@ async def delete_activity(activity_id: str, current_admin=Depends(get_current_ad
 @api_router.put("/admin/project")
 async def update_pedagogical_project(project: PedagogicalProjectUpdate, current_admin=Depends(get_current_admin)):
     project_obj = PedagogicalProject(**project.dict())
-    
-    # Upsert the project
+    doc = project_obj.dict(by_alias=True)
+    # _id is immutable, so it may only be written when the upsert inserts
+    project_id = doc.pop("_id")
     await db.pedagogical_projects.update_one(
         {},
-        {"$set": project_obj.dict()},
+        {"$set": doc, "$setOnInsert": {"_id": project_id}},
         upsert=True
     )
     return {"message": "Projet pédagogique mis à jour avec succès"}
 
 @api_router.get("/admin/stats")
 async def get_admin_stats(current_admin=Depends(get_current_admin)):
-    # Count members by branch
-    meute_count = await db.members.count_documents({"branch": "meute", "actif": True})
-    troupe_count = await db.members.count_documents({"branch": "troupe", "actif": True})
-    compagnie_count = await db.members.count_documents({"branch": "compagnie", "actif": True})
-    clan_count = await db.members.count_documents({"branch": "clan", "actif": True})
-    
-    # Count total activities
-    total_activities = await db.activities.count_documents({})
-    
+    # Count members of every branch in a single aggregation instead of one
+    # count_documents round-trip per branch
+    pipeline = [
+        {"$match": {"actif": True}},
+        {"$group": {"_id": "$branch", "n": {"$sum": 1}}}
+    ]
+
+    async def count_members_by_branch():
+        return {doc["_id"]: doc["n"] async for doc in db.members.aggregate(pipeline)}
+
+    branch_counts, total_activities = await asyncio.gather(
+        count_members_by_branch(),
+        db.activities.count_documents({})
+    )
+
+    members_by_branch = {
+        branch.value: branch_counts.get(code, 0)
+        for branch, code in BRANCH_CODES.items()
+    }
+    members_by_branch["total"] = sum(branch_counts.values())
+
     return {
-        "members_by_branch": {
-            "meute": meute_count,
-            "troupe": troupe_count,
-            "compagnie": compagnie_count,
-            "clan": clan_count,
-            "total": meute_count + troupe_count + compagnie_count + clan_count
-        },
+        "members_by_branch": members_by_branch,
         "total_activities": total_activities
     }
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Only the configured frontend origin(s) may make CORS requests; a
+# comma-separated list is accepted for staging setups
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
+    allow_origins=os.environ['FRONTEND_ORIGIN'].split(','),
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -347,6 +607,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_warm_mongo_pool():
+    # Force server selection and the first pool connections now rather than
+    # on the first user request
+    await client.admin.command("ping")
+
+@app.on_event("startup")
+async def startup_create_indexes():
+    # Cover the hot filters and sorts so list/update/delete queries stay
+    # index-backed as the collections grow
+    await db.members.create_index([("branch", 1), ("actif", 1)])
+    await db.activities.create_index([("branch", 1), ("date_activite", -1)])
+    await db.activities.create_index([("date_activite", -1)])
+    await db.admins.create_index("username", unique=True)
+
+async def _migrate_legacy_ids(collection):
+    # Documents written before the UUID-as-_id change carry an ObjectId _id
+    # plus the UUID in a parallel "id" field. _id cannot be updated in place,
+    # so rewrite each document under its UUID and drop the old one.
+    async for doc in collection.find({"id": {"$exists": True}}):
+        legacy_id = doc.pop("_id")
+        doc["_id"] = doc.pop("id")
+        await collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+        await collection.delete_one({"_id": legacy_id})
+
+async def _migrate_legacy_enum_strings():
+    # Branch/organ used to be stored as the enum strings; the filters and the
+    # stats aggregation now match on integer codes, so rewrite stored values
+    # before serving traffic or legacy documents would silently drop out of
+    # per-branch listings and counts
+    for branch, code in BRANCH_CODES.items():
+        await db.members.update_many({"branch": branch.value}, {"$set": {"branch": code}})
+        await db.activities.update_many({"branch": branch.value}, {"$set": {"branch": code}})
+    for organ, code in ORGAN_CODES.items():
+        await db.activities.update_many({"organ": organ.value}, {"$set": {"organ": code}})
+
+@app.on_event("startup")
+async def startup_migrate_legacy_documents():
+    for collection in (db.members, db.activities, db.admins, db.pedagogical_projects):
+        await _migrate_legacy_ids(collection)
+    await _migrate_legacy_enum_strings()
+
+@app.on_event("startup")
+async def startup_thread_pool():
+    # One worker per core: password hashing is CPU-bound, so more threads
+    # would only add contention
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count())
+    )
+
+@app.on_event("startup")
+async def startup_warm_models():
+    # Build every model's schema and validator now so the first request of
+    # each endpoint does not pay the one-off compilation cost
+    for model in (Admin, Member, MemberUpdate, Activity, ActivityUpdate, PedagogicalProject):
+        model.model_json_schema()
+    member_list_adapter.validate_python([])
+    activity_list_adapter.validate_python([])
+
+@app.on_event("startup")
+async def startup_admin_refresh():
+    global _admin_refresh_task
+    _admin_refresh_task = asyncio.create_task(_admin_refresh_loop())
+
+@app.on_event("shutdown")
+async def shutdown_admin_refresh():
+    if _admin_refresh_task is not None:
+        _admin_refresh_task.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=30,
+        workers=os.cpu_count(),
+    )
\ No newline at end of file